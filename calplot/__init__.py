@@ -6,4 +6,7 @@ __author__ = 'Tom Kwok'
 __contact__ = 'tom@tomkwok.com'
 __homepage__ = 'https://github.com/tomkwok/calplot'
 
-from .calplot import yearplot, calplot
+from .calplot import yearplot, weekplot, calplot
+from .store import DailyStore
+from .render import render, render_async, Renderer
+from .pyramid import Pyramid, pyramidplot
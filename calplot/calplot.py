@@ -15,6 +15,8 @@ from matplotlib.colors import ColorConverter, ListedColormap
 from matplotlib.patches import Polygon
 import matplotlib.pyplot as plt
 
+from .store import DailyStore
+
 def yearplot(data, year=None, how='sum',
              vmin=None, vmax=None,
              cmap='viridis', fillcolor='whitesmoke',
@@ -30,15 +32,18 @@ def yearplot(data, year=None, how='sum',
 
     Parameters
     ----------
-    data : Series
-        Data for the plot. Must be indexed by a DatetimeIndex.
+    data : Series or DailyStore
+        Data for the plot. Must be indexed by a DatetimeIndex, or be a
+        `DailyStore` of daily aggregates, of which only the plotted year is
+        read.
     year : integer
         Only data indexed by this year will be plotted. If `None`, the first
         year for which there is data will be plotted.
     how : string
         Method for resampling data by day. If `None`, assume data is already
         sampled by day and don't resample. Otherwise, this is passed to Pandas
-        `Series.resample`.
+        `Series.resample`. For a `DailyStore`, one of 'sum', 'count', 'min',
+        'max' or 'mean'.
     vmin, vmax : floats
         Values to anchor the colormap. If `None`, min and max are used after
         resampling data by day.
@@ -87,6 +92,15 @@ def yearplot(data, year=None, how='sum',
 
     """
 
+    if isinstance(data, DailyStore):
+        # Already aggregated by day, read just the year we plot.
+        if not len(data):
+            raise ValueError('Cannot plot an empty DailyStore')
+        if year is None:
+            year = data.years()[0]
+        data = data.series(how or 'sum', year=year)
+        how = None
+
     if year is None:
         year = data.index.sort_values()[0].year
 
@@ -97,6 +111,11 @@ def yearplot(data, year=None, how='sum',
         # Sample by day.
         by_day = data.resample('D').agg(how)
 
+    if by_day.index.tz is not None:
+        # Plot days by their local date, midnight may not exist in the zone.
+        by_day = by_day.copy()
+        by_day.index = by_day.index.tz_localize(None).normalize()
+
     # Default to dropping zero values for a series with over 50% of rows being zero.
     if not (dropzero is False) and (by_day[by_day == 0].count() > 0.5 * by_day.count()):
         dropzero = True
@@ -241,6 +260,245 @@ def yearplot(data, year=None, how='sum',
     return ax
 
 
+def _week_chunk(chunk, column):
+    """Return a chunk of data for `weekplot` as a Series without missing rows."""
+    if isinstance(chunk, pd.DataFrame):
+        if column is not None:
+            chunk = chunk[column]
+        elif chunk.shape[1] == 1:
+            chunk = chunk.squeeze(axis=1)
+        else:
+            raise TypeError('Data with %d columns needs a column to plot'
+                            % chunk.shape[1])
+    if not isinstance(chunk, pd.Series):
+        raise TypeError('Data must be a Series or DataFrame, not %s'
+                        % type(chunk).__name__)
+    if not isinstance(chunk.index, pd.DatetimeIndex):
+        raise TypeError('Data must be indexed by a DatetimeIndex')
+    return chunk[chunk.index.notna()].dropna()
+
+
+def _week_bins(chunks, bins, tz, how, column):
+    """Return sum, count, min and max per weekday and time of day bin.
+
+    Min and max are only accumulated when `how` asks for them.
+    """
+    size = 7 * bins
+    sums = np.zeros(size)
+    counts = np.zeros(size, dtype=np.int64)
+    mins = np.full(size, np.nan)
+    maxs = np.full(size, np.nan)
+
+    for chunk in chunks:
+        chunk = _week_chunk(chunk, column)
+        index = chunk.index
+        if tz is not None:
+            if index.tz is None:
+                index = index.tz_localize('UTC')
+            index = index.tz_convert(tz)
+        if index.tz is not None:
+            # Local wall time.
+            index = index.tz_localize(None)
+
+        # Seconds since the epoch, which was a Thursday.
+        seconds = index.values.astype('datetime64[s]').astype(np.int64)
+        days, seconds = np.divmod(seconds, 86400)
+        cells = ((days + 3) % 7) * bins + seconds * bins // 86400
+        values = chunk.values.astype(np.float64)
+
+        sums += np.bincount(cells, weights=values, minlength=size)
+        counts += np.bincount(cells, minlength=size)
+        if how == 'min':
+            np.fmin.at(mins, cells, values)
+        elif how == 'max':
+            np.fmax.at(maxs, cells, values)
+
+    return sums, counts, mins, maxs
+
+
+def weekplot(data, how='sum', bins=24, tz=None, column=None,
+             vmin=None, vmax=None,
+             cmap='viridis', fillcolor='whitesmoke',
+             linewidth=1, linecolor=None,
+             daylabels=calendar.day_abbr[:], dayticks=True,
+             hourlabels=None, hourticks=True,
+             dropzero=None,
+             textformat=None, textfiller='', textcolor='black',
+             ax=None, **kwargs):
+    """
+    Plot a timeseries as a heatmap of time of day per day of week.
+
+    Parameters
+    ----------
+    data : Series or DataFrame or iterable of these
+        Data for the plot. Must be indexed by a DatetimeIndex. An iterable of
+        chunks, such as read with `pandas.read_csv(..., index_col=0,
+        parse_dates=True, chunksize=n)`, is aggregated in one pass.
+    how : string
+        Method for aggregating data per cell. One of 'sum', 'count', 'min',
+        'max' or 'mean'.
+    bins : integer
+        Number of cells per day, e.g. 24 for hours or 48 for half hours. Must
+        be a positive integer dividing 86400.
+    tz : string or tzinfo
+        Time zone in which to bin timestamps. Naive timestamps are taken as
+        UTC. If `None`, timestamps are binned in their own local time.
+    column : label
+        Column to plot for DataFrame data. If `None`, DataFrame data must
+        have a single column.
+    vmin, vmax : floats
+        Values to anchor the colormap. If `None`, min and max are used after
+        aggregating data per cell.
+    cmap : matplotlib colormap name or object
+        The mapping from data values to color space.
+    fillcolor : matplotlib color
+        Color to use for cells without data.
+    linewidth : float
+        Width of the lines that will divide each cell.
+    linecolor : color
+        Color of the lines that will divide each cell. If `None`, the axes
+        background color is used, or 'white' if it is transparent.
+    daylabels : list
+        Strings to use as labels for days, must be of length 7.
+    dayticks : list or int or bool
+        If `True`, label all days. If `False`, don't label days. If a list,
+        only label days with these indices. If an integer, label every n day.
+    hourlabels : list
+        Strings to use as labels for hours, must be of length 24. If `None`,
+        the hour numbers are used.
+    hourticks : list or int or bool
+        If `True`, label all hours. If `False`, don't label hours. If a list,
+        only label hours with these indices. If an integer, label every n
+        hour.
+    dropzero : bool
+        If `True`, don't fill a color for cells with a zero value.
+    textformat : string
+        Text format string for grid cell text
+    textfiller : string
+        Fallback text for grid cell text for cells with no data
+    textcolor : color
+        Color of the grid cell text
+    ax : matplotlib Axes
+        Axes in which to draw the plot, otherwise use the currently-active
+        Axes.
+    kwargs : other keyword arguments
+        All other keyword arguments are passed to matplotlib `ax.pcolormesh`.
+
+    Returns
+    -------
+    ax : matplotlib Axes
+        Axes object with the heatmap.
+
+    """
+
+    if how not in ('sum', 'count', 'min', 'max', 'mean'):
+        raise ValueError('Unsupported aggregation for weekplot: %r' % how)
+    if not isinstance(bins, (int, np.integer)) or bins <= 0 or 86400 % bins:
+        raise ValueError('Number of bins must divide a day: %r' % bins)
+
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        data = [data]
+    sums, counts, mins, maxs = _week_bins(data, bins, tz, how, column)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = {'sum': sums, 'count': counts, 'min': mins, 'max': maxs,
+                  'mean': sums / counts}[how].astype(np.float64)
+    values[counts == 0] = np.nan
+
+    # Default to dropping zero values for a series with over 50% of cells being zero.
+    present = ~np.isnan(values)
+    if not (dropzero is False) and \
+            (np.count_nonzero(values[present] == 0) > 0.5 * present.sum()):
+        dropzero = True
+
+    if dropzero:
+        values[values == 0] = np.nan
+
+    # Min and max per cell.
+    if vmin is None:
+        vmin = np.nanmin(values) if present.any() else None
+    if vmax is None:
+        vmax = np.nanmax(values) if present.any() else None
+
+    if ax is None:
+        ax = plt.gca()
+
+    if linecolor is None:
+        # Mimic transparent lines with the axes background color, see
+        # `yearplot`.
+        linecolor = ax.get_facecolor()
+        if ColorConverter().to_rgba(linecolor)[-1] == 0:
+            linecolor = 'white'
+
+    # One row per day of week with Monday on top.
+    plot_data = values.reshape(7, bins)[::-1]
+    plot_data = np.ma.masked_where(np.isnan(plot_data), plot_data)
+    fill_data = np.ones((7, bins))
+
+    # Draw heatmap for all cells with fill color.
+    ax.pcolormesh(fill_data, vmin=0, vmax=1, cmap=ListedColormap([fillcolor]))
+
+    # Draw heatmap.
+    kwargs['linewidth'] = linewidth
+    kwargs['edgecolors'] = linecolor
+    ax.pcolormesh(plot_data, vmin=vmin, vmax=vmax, cmap=cmap, **kwargs)
+
+    # Limit heatmap to our data.
+    ax.set(xlim=(0, bins), ylim=(0, 7))
+
+    # Square cells.
+    ax.set_aspect('equal')
+
+    # Remove spines and ticks.
+    for side in ('top', 'right', 'left', 'bottom'):
+        ax.spines[side].set_visible(False)
+    for axis in (ax.xaxis, ax.yaxis):
+        axis.set_tick_params(which='both', length=0)
+
+    if hourlabels is None:
+        hourlabels = [str(i) for i in range(24)]
+
+    # Get indices for hourlabels.
+    if hourticks is True:
+        hourticks = range(len(hourlabels))
+    elif hourticks is False:
+        hourticks = []
+    elif isinstance(hourticks, int):
+        hourticks = range(0, len(hourlabels), hourticks)
+
+    # Get indices for daylabels.
+    if dayticks is True:
+        dayticks = range(len(daylabels))
+    elif dayticks is False:
+        dayticks = []
+    elif isinstance(dayticks, int):
+        dayticks = range(0, len(daylabels), dayticks)
+
+    ax.set_xlabel('')
+    ax.set_xticks([(i + 0.5) * bins / 24 for i in hourticks])
+    ax.set_xticklabels([hourlabels[i] for i in hourticks])
+
+    ax.set_ylabel('')
+    ax.yaxis.set_ticks_position('right')
+    ax.set_yticks([6 - i + 0.5 for i in dayticks])
+    ax.set_yticklabels([daylabels[i] for i in dayticks], rotation='horizontal',
+                       va='center')
+
+    # Text in mesh grid if format is specified.
+    if textformat is not None:
+        for y in range(plot_data.shape[0]):
+            for x in range(plot_data.shape[1]):
+                masked = plot_data[y, x]
+                if masked is np.ma.masked:
+                    content = textfiller
+                else:
+                    content = textformat.format(masked)
+                ax.text(x + 0.5, y + 0.5, content, color=textcolor,
+                         ha='center', va='center')
+
+    return ax
+
+
 def calplot(data, how='sum',
             yearlabels=True, yearascending=True,
             yearlabel_kws=None, subplot_kws=None, gridspec_kws=None,
@@ -252,12 +510,14 @@ def calplot(data, how='sum',
 
     Parameters
     ----------
-    data : Series
-        Data for the plot. Must be indexed by a DatetimeIndex.
+    data : Series or DailyStore
+        Data for the plot. Must be indexed by a DatetimeIndex, or be a
+        `DailyStore` of daily aggregates.
     how : string
         Method for resampling data by day. If `None`, assume data is already
         sampled by day and don't resample. Otherwise, this is passed to Pandas
-        `Series.resample`.
+        `Series.resample`. For a `DailyStore`, one of 'sum', 'count', 'min',
+        'max' or 'mean'.
     figsize : (float, float)
         Size of figure for the plot.
     suptitle : string
@@ -300,6 +560,13 @@ def calplot(data, how='sum',
     if suptitle_kws is None:
         suptitle_kws = dict()
 
+    if isinstance(data, DailyStore):
+        # Already aggregated by day, no resampling needed.
+        if not len(data):
+            raise ValueError('Cannot plot an empty DailyStore')
+        data = data.series(how or 'sum')
+        how = None
+
     years = np.unique(data.index.year)
     if not yearascending:
         years = years[::-1]
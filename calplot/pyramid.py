@@ -0,0 +1,278 @@
+"""
+Pre-aggregated day, week and month levels for zoomable calendar heatmaps.
+
+Build the levels once from the daily aggregation and draw the finest level
+that fits the requested span and cell budget, so that overviews of many years
+draw a few hundred cells instead of one per day.
+"""
+
+import calendar
+
+import numpy as np
+import pandas as pd
+
+from matplotlib.colors import ColorConverter, ListedColormap
+import matplotlib.pyplot as plt
+
+from .calplot import yearplot
+from .store import DailyStore
+
+LEVELS = ('D', 'W', 'M')
+
+# Resampling rules for each level, weeks start on Monday and are labelled by
+# their first day.
+_RULES = {'W': dict(rule='W-MON', label='left', closed='left'),
+          'M': dict(rule='MS')}
+
+_AGGS = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+# Cells of the full grid drawn by `yearplot`, 53 weeks of 7 days.
+_YEAR_CELLS = 53 * 7
+
+
+class Pyramid(object):
+    """
+    Day, week and month aggregates of a timeseries.
+
+    Each level keeps the sum, count, min and max per cell, so that any of the
+    supported aggregations can be read from any level.
+
+    Parameters
+    ----------
+    data : Series or DailyStore
+        Events to aggregate, indexed by a DatetimeIndex, or a `DailyStore` of
+        daily aggregates.
+
+    """
+
+    def __init__(self, data):
+        if isinstance(data, DailyStore):
+            by_day = pd.DataFrame({how: data.series(how) for how in _AGGS})
+            by_day['count'] = by_day['count'].fillna(0)
+            by_day['sum'] = by_day['sum'].fillna(0)
+        else:
+            by_day = data.resample('D').agg(list(_AGGS))
+
+        self.levels = {'D': by_day}
+        for level, rule in _RULES.items():
+            rule = dict(rule)
+            resampler = by_day.resample(rule.pop('rule'), **rule)
+            self.levels[level] = resampler.agg(_AGGS)
+
+    def _timestamp(self, value):
+        """Return `value` as a Timestamp in the time zone of the pyramid."""
+        value = pd.Timestamp(value)
+        tz = self.levels['D'].index.tz
+        if value.tz is None and tz is not None:
+            value = value.tz_localize(tz, nonexistent='shift_forward',
+                                      ambiguous=True)
+        return value
+
+    @property
+    def start(self):
+        return self.levels['D'].index[0]
+
+    @property
+    def end(self):
+        return self.levels['D'].index[-1]
+
+    def series(self, level, how='sum', start=None, end=None):
+        """
+        Return the aggregates of one level as a Series.
+
+        Parameters
+        ----------
+        level : string
+            One of 'D', 'W' or 'M'.
+        how : string
+            One of 'sum', 'count', 'min', 'max' or 'mean'.
+        start, end : datetime-like
+            If given, only return cells starting within this range. Naive
+            values are taken in the time zone of the pyramid.
+
+        Returns
+        -------
+        by_level : Series
+            Aggregated value per cell, NaN for cells without events.
+
+        """
+        if how not in ('sum', 'count', 'min', 'max', 'mean'):
+            raise ValueError('Unsupported aggregation for a pyramid: %r' % how)
+        if level not in LEVELS:
+            raise ValueError('Unsupported level for a pyramid: %r' % level)
+
+        if start is not None:
+            start = self._timestamp(start)
+        if end is not None:
+            end = self._timestamp(end)
+        cells = self.levels[level].loc[start:end]
+        count = cells['count']
+        if how == 'mean':
+            values = cells['sum'] / count
+        else:
+            values = cells[how].astype(np.float64)
+        return values.where(count > 0)
+
+    def choose(self, start, end, max_cells):
+        """
+        Return the finest level drawing at most `max_cells` cells for a span.
+
+        The daily level is only used for spans within one calendar year, and
+        counts as the full grid of the year drawn by `yearplot`. Week and
+        month levels draw one row per year. If no level fits, the month level
+        is returned.
+
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        years = end.year - start.year + 1
+        if years == 1 and _YEAR_CELLS <= max_cells:
+            return 'D'
+        if years * 53 <= max_cells:
+            return 'W'
+        return 'M'
+
+
+def pyramidplot(pyramid, start=None, end=None, how='sum', level=None,
+                max_cells=None, cellsize=4,
+                vmin=None, vmax=None,
+                cmap='viridis', fillcolor='whitesmoke',
+                linewidth=1, linecolor=None,
+                ax=None, **kwargs):
+    """
+    Plot a span of a pyramid at the finest level fitting the cell budget.
+
+    Parameters
+    ----------
+    pyramid : Pyramid
+        Pre-aggregated data for the plot.
+    start, end : datetime-like
+        Span to plot. If `None`, the first and last day of the pyramid. Naive
+        values are taken in the time zone of the pyramid.
+    how : string
+        One of 'sum', 'count', 'min', 'max' or 'mean'.
+    level : string
+        One of 'D', 'W' or 'M' to force a level. The daily level requires a
+        span within one calendar year. If `None`, the level is chosen by
+        `Pyramid.choose`.
+    max_cells : integer
+        Maximum number of cells to draw. If `None`, the pixel area of the
+        axes divided by the area of a `cellsize` square.
+    cellsize : float
+        Minimum width in pixels of a cell, used to derive `max_cells`.
+    vmin, vmax : floats
+        Values to anchor the colormap. If `None`, min and max of the plotted
+        cells are used.
+    cmap : matplotlib colormap name or object
+        The mapping from data values to color space.
+    fillcolor : matplotlib color
+        Color to use for cells without data.
+    linewidth : float
+        Width of the lines that will divide each cell.
+    linecolor : color
+        Color of the lines that will divide each cell. If `None`, the axes
+        background color is used, or 'white' if it is transparent.
+    ax : matplotlib Axes
+        Axes in which to draw the plot, otherwise use the currently-active
+        Axes.
+    kwargs : other keyword arguments
+        All other keyword arguments are passed to `yearplot` for the daily
+        level and to matplotlib `ax.pcolormesh` otherwise.
+
+    Returns
+    -------
+    ax : matplotlib Axes
+        Axes object with the calendar heatmap.
+
+    """
+
+    start = pyramid.start if start is None else pyramid._timestamp(start)
+    end = pyramid.end if end is None else pyramid._timestamp(end)
+
+    if level is not None and level not in LEVELS:
+        raise ValueError('Unsupported level for a pyramid: %r' % level)
+
+    if ax is None:
+        ax = plt.gca()
+
+    if level is None:
+        if max_cells is None:
+            bbox = ax.get_window_extent()
+            max_cells = int(bbox.width * bbox.height / cellsize ** 2)
+        level = pyramid.choose(start, end, max_cells)
+
+    if level == 'D':
+        if start.year != end.year:
+            raise ValueError('Daily level needs a span within one year, '
+                             'not %s to %s' % (start, end))
+        by_day = pyramid.series('D', how, start, end)
+        return yearplot(by_day, year=start.year, how=None,
+                        vmin=vmin, vmax=vmax, cmap=cmap, fillcolor=fillcolor,
+                        linewidth=linewidth, linecolor=linecolor, ax=ax,
+                        **kwargs)
+
+    # Week and month cells are drawn with one row per year. Select all cells
+    # overlapping the span, weeks belong to the year of their Thursday.
+    if level == 'W':
+        first = start.normalize() - pd.Timedelta(days=start.dayofweek)
+    else:
+        first = start.normalize().replace(day=1)
+    by_level = pyramid.series(level, how, first, end)
+    if by_level.empty:
+        raise ValueError('No cells in span %s to %s' % (start, end))
+    if vmin is None:
+        vmin = by_level.min()
+    if vmax is None:
+        vmax = by_level.max()
+
+    if linecolor is None:
+        linecolor = ax.get_facecolor()
+        if ColorConverter().to_rgba(linecolor)[-1] == 0:
+            linecolor = 'white'
+
+    index = by_level.index
+    if level == 'W':
+        index = index + pd.Timedelta(days=3)
+        columns, labels = 53, None
+        column = (index.dayofyear.values - 1) // 7
+    else:
+        columns, labels = 12, calendar.month_abbr[1:]
+        column = index.month.values - 1
+    years = np.arange(index.year.min(), index.year.max() + 1)
+    row = years[-1] - index.year.values
+
+    plot_data = np.full((len(years), columns), np.nan)
+    fill_data = np.full((len(years), columns), np.nan)
+    plot_data[row, column] = by_level.values
+    fill_data[row, column] = 1
+    plot_data = np.ma.masked_where(np.isnan(plot_data), plot_data)
+    fill_data = np.ma.masked_where(np.isnan(fill_data), fill_data)
+
+    ax.pcolormesh(fill_data, vmin=0, vmax=1, cmap=ListedColormap([fillcolor]))
+
+    kwargs['linewidth'] = linewidth
+    kwargs['edgecolors'] = linecolor
+    ax.pcolormesh(plot_data, vmin=vmin, vmax=vmax, cmap=cmap, **kwargs)
+
+    ax.set(xlim=(0, columns), ylim=(0, len(years)))
+    ax.set_aspect('equal')
+
+    for side in ('top', 'right', 'left', 'bottom'):
+        ax.spines[side].set_visible(False)
+    for axis in (ax.xaxis, ax.yaxis):
+        axis.set_tick_params(which='both', length=0)
+
+    ax.set_xlabel('')
+    if labels is None:
+        ax.set_xticks([])
+    else:
+        ax.set_xticks(np.arange(columns) + 0.5)
+        ax.set_xticklabels(labels)
+
+    # Label at most ten years on the side.
+    step = max(1, len(years) // 10)
+    ax.set_ylabel('')
+    ax.yaxis.set_ticks_position('right')
+    ax.set_yticks(np.arange(len(years))[::step] + 0.5)
+    ax.set_yticklabels(years[::-1][::step], rotation='horizontal', va='center')
+
+    return ax
@@ -0,0 +1,217 @@
+"""
+Render calendar heatmaps to image bytes, synchronously or from asyncio code.
+
+The asyncio entry point moves the CPU-bound rendering onto an executor,
+bounds the number of renders in flight and coalesces identical concurrent
+requests into a single render.
+
+Renders on executor threads create figures through pyplot off the main
+thread, which is only safe with a non-interactive backend. Select one before
+rendering, e.g. with `matplotlib.use('agg')` or `MPLBACKEND=agg`.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import matplotlib.pyplot as plt
+
+from .calplot import calplot
+from .store import DailyStore
+
+# Pyplot keeps global state, so renders sharing one process must not
+# interleave. Process pools render in parallel, thread pools one at a time.
+_pyplot_lock = threading.Lock()
+
+
+def render(data, format='png', savefig_kws=None, **kwargs):
+    """
+    Plot a timeseries as a calendar heatmap and return the image as bytes.
+
+    Called outside the main thread, this requires a non-interactive
+    matplotlib backend such as Agg.
+
+    Parameters
+    ----------
+    data : Series or DailyStore
+        Data for the plot, as for `calplot`.
+    format : string
+        Image format passed to matplotlib `savefig`, e.g. 'png' or 'svg'.
+    savefig_kws : dict
+        Keyword arguments passed to the matplotlib `savefig` call.
+    kwargs : other keyword arguments
+        All other keyword arguments are passed to `calplot`.
+
+    Returns
+    -------
+    image : bytes
+        The rendered figure.
+
+    """
+    if savefig_kws is None:
+        savefig_kws = dict()
+
+    buf = io.BytesIO()
+    with _pyplot_lock:
+        fig, _ = calplot(data, **kwargs)
+        try:
+            fig.savefig(buf, format=format, **savefig_kws)
+        finally:
+            plt.close(fig)
+    return buf.getvalue()
+
+
+def _fingerprint(value, digest):
+    """Feed the content of `value` to `digest`, `False` if not supported."""
+    if value is None or isinstance(value, (bool, int, float, complex, str,
+                                           bytes, np.generic)):
+        digest.update(repr((type(value).__name__, value)).encode())
+        return True
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return False
+        digest.update(repr(('ndarray', value.dtype.str, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+        return True
+    if isinstance(value, (pd.Series, pd.DataFrame, pd.Index)):
+        # Hashes ignore the time zone and column names, the dtypes do not.
+        index = value if isinstance(value, pd.Index) else value.index
+        dtypes = value.dtypes if isinstance(value, pd.DataFrame) else \
+            value.dtype
+        digest.update(repr((type(value).__name__, str(dtypes),
+                            str(index.dtype))).encode())
+        digest.update(pd.util.hash_pandas_object(value).values.tobytes())
+        return True
+    if isinstance(value, (tuple, list)):
+        digest.update(repr((type(value).__name__, len(value))).encode())
+        return all(_fingerprint(item, digest) for item in value)
+    if isinstance(value, dict):
+        digest.update(repr(('dict', len(value))).encode())
+        try:
+            items = sorted(value.items())
+        except TypeError:
+            return False
+        return all(_fingerprint(k, digest) and _fingerprint(v, digest)
+                   for k, v in items)
+    return False
+
+
+def _request_key(data, format, savefig_kws, kwargs):
+    """
+    Return a digest identifying the data and arguments of a render.
+
+    Returns `None` if an argument cannot be identified by its content, in
+    which case the render is not coalesced.
+    """
+    digest = hashlib.sha1()
+    if isinstance(data, DailyStore):
+        # Identify a store by its file state rather than reading it.
+        digest.update(repr(('store', os.path.abspath(data.path), len(data),
+                            data._state)).encode())
+    elif not _fingerprint(data, digest):
+        return None
+    if not _fingerprint((format, savefig_kws, kwargs), digest):
+        return None
+    return digest.hexdigest()
+
+
+class Renderer(object):
+    """
+    Asynchronous calendar heatmap renderer.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        Executor running the renders. If `None`, the default executor of the
+        event loop is used. Use a `ProcessPoolExecutor` to render in parallel,
+        as renders in one process are serialized. Thread pools require a
+        non-interactive matplotlib backend such as Agg.
+    max_concurrency : integer
+        Maximum number of renders submitted to the executor at once.
+
+    """
+
+    def __init__(self, executor=None, max_concurrency=4):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._semaphore = None
+        self._inflight = dict()
+
+    async def _render(self, data, format, savefig_kws, kwargs):
+        async with self._semaphore:
+            return await self._loop.run_in_executor(
+                self.executor, _render_call, data, format, savefig_kws, kwargs)
+
+    async def render(self, data, format='png', savefig_kws=None, **kwargs):
+        """
+        Render a calendar heatmap to bytes without blocking the event loop.
+
+        Takes the same arguments as the `render` function. Concurrent calls
+        with equal data and arguments share the result of a single render.
+        Arguments that cannot be compared by content, such as colormap
+        objects, disable this sharing for the call.
+
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores and tasks belong to one event loop.
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = dict()
+
+        # Hashing is proportional to the data, keep it off the event loop.
+        key = await loop.run_in_executor(None, _request_key, data, format,
+                                         savefig_kws, kwargs)
+        task = self._inflight.get(key) if key is not None else None
+        if task is None:
+            task = loop.create_task(
+                self._render(data, format, savefig_kws, kwargs))
+            if key is not None:
+                self._inflight[key] = task
+                task.add_done_callback(
+                    lambda _: self._inflight.pop(key, None))
+        # Shield the shared render from cancellation of one of its callers.
+        return await asyncio.shield(task)
+
+
+def _render_call(data, format, savefig_kws, kwargs):
+    # Module level so it can be pickled for process pools.
+    return render(data, format=format, savefig_kws=savefig_kws, **kwargs)
+
+
+_default_renderer = Renderer()
+
+
+async def render_async(data, format='png', savefig_kws=None, **kwargs):
+    """
+    Render a calendar heatmap to bytes from asyncio code.
+
+    Uses a shared `Renderer` on the default executor of the event loop, so a
+    non-interactive matplotlib backend such as Agg is required. Create a
+    `Renderer` to configure the executor and concurrency limit.
+
+    Parameters
+    ----------
+    data : Series or DailyStore
+        Data for the plot, as for `calplot`.
+    format : string
+        Image format passed to matplotlib `savefig`, e.g. 'png' or 'svg'.
+    savefig_kws : dict
+        Keyword arguments passed to the matplotlib `savefig` call.
+    kwargs : other keyword arguments
+        All other keyword arguments are passed to `calplot`.
+
+    Returns
+    -------
+    image : bytes
+        The rendered figure.
+
+    """
+    return await _default_renderer.render(data, format=format,
+                                          savefig_kws=savefig_kws, **kwargs)
@@ -0,0 +1,256 @@
+"""
+Persistent day-indexed aggregates for calendar heatmaps.
+
+Keep per-day sum, count, min and max of a timeseries in a memory-mapped file
+so that new events can be merged in incrementally and plotted without
+resampling the full history.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DAY_DTYPE = np.dtype([('sum', 'f8'), ('count', 'i8'),
+                      ('min', 'f8'), ('max', 'f8')])
+
+_EMPTY_DAY = np.array([(0., 0, np.nan, np.nan)], dtype=DAY_DTYPE)[0]
+
+_META = 'meta.json'
+
+
+def _days_name(start):
+    """Return the file name of the records of a store starting at `start`."""
+    return 'days-%d.bin' % start
+
+
+def _day_numbers(index, tz):
+    """Return days since the epoch for a DatetimeIndex, in local time `tz`."""
+    if index.tz is not None:
+        if tz is not None:
+            index = index.tz_convert(tz)
+        index = index.tz_localize(None)
+    return index.values.astype('datetime64[D]').astype(np.int64)
+
+
+class DailyStore(object):
+    """
+    On-disk daily aggregates of a timeseries backed by `np.memmap`.
+
+    The store is a directory holding a small JSON header and one packed
+    binary file of `DAY_DTYPE` records, one per calendar day starting at the
+    first ingested day. Days without events have a count of zero and NaN as
+    min and max.
+
+    The records are mapped read-only until `ingest` is called, and changes
+    made by other processes are picked up on the next read.
+
+    Parameters
+    ----------
+    path : string
+        Directory of the store. It is created on the first call to `ingest`
+        if it does not exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.start = None
+        self.tz = None
+        self._days = None
+        self._writable = False
+        self._state = None
+        self._refresh()
+
+    def __reduce__(self):
+        # Reopen from disk rather than copying the records, e.g. when sent to
+        # a process pool.
+        return (DailyStore, (self.path,))
+
+    def __len__(self):
+        self._refresh()
+        return 0 if self._days is None else len(self._days)
+
+    def _filename(self):
+        return os.path.join(self.path, _days_name(self.start))
+
+    def _refresh(self):
+        """Remap the records if the store changed on disk."""
+        try:
+            meta_stat = os.stat(os.path.join(self.path, _META))
+            with open(os.path.join(self.path, _META)) as meta:
+                meta = json.load(meta)
+            size = os.path.getsize(os.path.join(self.path,
+                                                _days_name(meta['start'])))
+        except FileNotFoundError:
+            return
+        state = (meta_stat.st_mtime_ns, meta['start'], size)
+        if state == self._state:
+            return
+        self.start = meta['start']
+        self.tz = meta['tz']
+        self._open(self._writable)
+
+    def _open(self, writable=False):
+        filename = self._filename()
+        size = os.path.getsize(filename)
+        length = size // DAY_DTYPE.itemsize
+        self._days = None
+        self._writable = writable
+        if length:
+            self._days = np.memmap(filename, dtype=DAY_DTYPE,
+                                   mode='r+' if writable else 'r',
+                                   shape=(length,))
+        meta_stat = os.stat(os.path.join(self.path, _META))
+        self._state = (meta_stat.st_mtime_ns, self.start, size)
+
+    def _write_meta(self):
+        # Replace the header atomically so it always names a complete file.
+        filename = os.path.join(self.path, _META)
+        with open(filename + '.tmp', 'w') as meta:
+            json.dump({'start': self.start, 'tz': self.tz}, meta)
+        os.replace(filename + '.tmp', filename)
+
+    def _grow(self, first, last):
+        """Make room for days `first` to `last` inclusive (epoch days)."""
+        if self.start is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.start = int(first)
+            open(self._filename(), 'wb').close()
+            self._write_meta()
+            self._open(writable=True)
+
+        if first < self.start:
+            # Prepending requires rewriting the whole file, which should be
+            # rare as stores are normally extended forwards in time. The
+            # records are written to a new file before the header is switched
+            # over, so an interrupted rewrite leaves the store unchanged.
+            old = np.array(self._days) if self._days is not None else \
+                np.empty(0, dtype=DAY_DTYPE)
+            new = np.full(self.start - first, _EMPTY_DAY, dtype=DAY_DTYPE)
+            old_filename = self._filename()
+            filename = os.path.join(self.path, _days_name(first))
+            with open(filename + '.tmp', 'wb') as days:
+                new.tofile(days)
+                old.tofile(days)
+                days.flush()
+                os.fsync(days.fileno())
+            os.replace(filename + '.tmp', filename)
+            self._days = None
+            self.start = int(first)
+            self._write_meta()
+            os.remove(old_filename)
+            self._open(writable=True)
+
+        missing = last - self.start + 1 - len(self)
+        if missing > 0:
+            # Appending only writes the new records.
+            self._days = None
+            with open(self._filename(), 'ab') as days:
+                np.full(missing, _EMPTY_DAY, dtype=DAY_DTYPE).tofile(days)
+            self._open(writable=True)
+
+    def ingest(self, data):
+        """
+        Merge raw events into the store.
+
+        Only the days spanned by `data` are read and written, so ingesting
+        one day of events costs the same regardless of the history size.
+
+        Parameters
+        ----------
+        data : Series
+            Events to add. Must be indexed by a DatetimeIndex. Events are
+            assigned to days in the time zone of the first ingested data.
+
+        """
+        data = data[data.index.notna()].dropna()
+        if data.empty:
+            return
+
+        self._refresh()
+
+        if self.start is None and data.index.tz is not None:
+            self.tz = str(data.index.tz)
+        elif self.tz is not None and data.index.tz is None:
+            raise ValueError('Store is time zone aware, data is not')
+        elif self.tz is None and data.index.tz is not None:
+            raise ValueError('Data is time zone aware, store is not')
+
+        days = _day_numbers(data.index, self.tz)
+        values = data.values.astype(np.float64)
+        first, last = days.min(), days.max()
+        if self.start is not None and not self._writable:
+            self._open(writable=True)
+        self._grow(first, last)
+
+        offsets = days - first
+        span = last - first + 1
+        mins = np.full(span, np.nan)
+        maxs = np.full(span, np.nan)
+        np.fmin.at(mins, offsets, values)
+        np.fmax.at(maxs, offsets, values)
+
+        window = self._days[first - self.start:last - self.start + 1]
+        window['sum'] += np.bincount(offsets, weights=values, minlength=span)
+        window['count'] += np.bincount(offsets, minlength=span)
+        window['min'] = np.fmin(window['min'], mins)
+        window['max'] = np.fmax(window['max'], maxs)
+        self._days.flush()
+
+    def years(self):
+        """Return the calendar years covered by the store."""
+        if not len(self):
+            return np.array([], dtype=int)
+        first = pd.Timestamp(np.datetime64(self.start, 'D')).year
+        last = pd.Timestamp(np.datetime64(self.start + len(self) - 1, 'D')).year
+        return np.arange(first, last + 1)
+
+    def series(self, how='sum', year=None):
+        """
+        Return daily aggregates as a Series indexed by day.
+
+        Parameters
+        ----------
+        how : string
+            One of 'sum', 'count', 'min', 'max' or 'mean'.
+        year : integer
+            If given, only read days of this year from the store.
+
+        Returns
+        -------
+        by_day : Series
+            Aggregated value per day, NaN for days without events. Days
+            starting at a time skipped by a DST change are indexed by the
+            first valid time of the day.
+
+        """
+        if how not in ('sum', 'count', 'min', 'max', 'mean'):
+            raise ValueError('Unsupported aggregation for a store: %r' % how)
+
+        first, last = 0, len(self)
+        if year is not None:
+            first = max(first, np.datetime64(str(year), 'D').astype(np.int64)
+                        - (self.start or 0))
+            last = min(last, np.datetime64(str(year + 1), 'D')
+                       .astype(np.int64) - (self.start or 0))
+        first = min(first, last)
+
+        days = self._days[first:last] if self._days is not None else \
+            np.empty(0, dtype=DAY_DTYPE)
+        count = days['count']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if how == 'mean':
+                values = days['sum'] / count
+            else:
+                values = days[how].astype(np.float64)
+        values = np.where(count > 0, values, np.nan)
+
+        index = pd.DatetimeIndex(
+            (np.arange(first, last) + (self.start or 0)).astype('datetime64[D]'))
+        if self.tz is not None:
+            # Midnight may be skipped or repeated by a DST change.
+            index = index.tz_localize(self.tz, nonexistent='shift_forward',
+                                      ambiguous=np.ones(len(index), dtype=bool))
+        return pd.Series(values, index=index)